@@ -1,21 +1,31 @@
 from __future__ import annotations
 
 from typing import List, Dict, Any, Callable, Tuple, Optional
-from pathlib import Path
 import csv
 import math
 import re
 
-from shapely import affinity
-from shapely.geometry import Polygon, MultiPolygon
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
 
-from metrics import parcel_metrics
-from volume_generator import extrude_polygon
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+except ImportError:  # optional: only needed for save_feather
+    pa = None
+
+from metrics import parcel_metrics_batch
+from geom_utils import ensure_parent, largest_parts
+from volume_generator import extrude_polygons
 
 
 # -----------------------------
 # Parsing helpers
 # -----------------------------
+_NUM_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+
+
 def _to_number(x: Any, default: Optional[float] = None) -> Optional[float]:
     """
     Parse numbers from: 60, '60', '60%', '60*', ' 180 % ', '250*' ...
@@ -31,7 +41,7 @@ def _to_number(x: Any, default: Optional[float] = None) -> Optional[float]:
         return default
 
     s = s.replace(",", "")
-    m = re.search(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?", s)
+    m = _NUM_RE.search(s)
     if not m:
         return default
     try:
@@ -40,61 +50,88 @@ def _to_number(x: Any, default: Optional[float] = None) -> Optional[float]:
         return default
 
 
-def _to_ratio(x: Any, default: float = 0.6) -> float:
+def _to_numbers(values: List[Any], default: float) -> np.ndarray:
+    """
+    Column version of _to_number: one float per value, `default` where it
+    cannot be parsed or is not finite. Each distinct string is parsed only once (property
+    columns repeat a handful of values like '60%' across all parcels).
+    """
+    out = np.empty(len(values))
+    cache: Dict[str, Optional[float]] = {}
+    for i, x in enumerate(values):
+        if isinstance(x, (int, float)):
+            v = float(x)
+        elif isinstance(x, str):
+            if x not in cache:
+                cache[x] = _to_number(x)
+            v = cache[x]
+        else:
+            v = _to_number(x)
+        # NaN / inf would survive clip/maximum and poison the floors cast
+        out[i] = default if v is None or not math.isfinite(v) else v
+    return out
+
+
+def _to_ratios(values: List[Any], default: float = 0.6) -> np.ndarray:
     """
     建蔽率 building_r:
     - allow 0~1 ratio
     - allow 0~100 percent style (60 / '60%' -> 0.6)
     """
-    v = _to_number(x, default=default)
-    if v is None:
-        v = default
-    if v > 1.0:
-        v = v / 100.0
-    return max(0.0, min(v, 1.0))
+    v = _to_numbers(values, default)
+    v = np.where(v > 1.0, v / 100.0, v)
+    return np.clip(v, 0.0, 1.0)
 
 
-def _to_far(x: Any, default: float = 2.5) -> float:
+def _to_fars(values: List[Any], default: float = 2.5) -> np.ndarray:
     """
     容積率 floor_r:
     - if given as '180%' -> 1.8
     - if given as 2.5 -> 2.5
     - if given as 180 (percent style) -> 1.8
     """
-    v = _to_number(x, default=default)
-    if v is None:
-        v = default
+    v = _to_numbers(values, default)
     # percent-style guard
-    if v > 10.0:
-        v = v / 100.0
-    return max(0.0, v)
+    v = np.where(v > 10.0, v / 100.0, v)
+    return np.maximum(v, 0.0)
+
+
+def _to_ratio(x: Any, default: float = 0.6) -> float:
+    """Scalar _to_ratios."""
+    return float(_to_ratios([x], default=default)[0])
+
+
+def _to_far(x: Any, default: float = 2.5) -> float:
+    """Scalar _to_fars."""
+    return float(_to_fars([x], default=default)[0])
 
 
 # -----------------------------
 # Geometry helpers
 # -----------------------------
-def _largest_polygon(geom: Polygon | MultiPolygon) -> Polygon:
-    """If MultiPolygon, keep the largest non-empty piece."""
-    if isinstance(geom, MultiPolygon):
-        parts = [g for g in geom.geoms if (not g.is_empty and g.area > 1e-9)]
-        if not parts:
-            raise ValueError("MultiPolygon has no non-empty parts.")
-        return max(parts, key=lambda g: g.area)
-    return geom
-
-
-def _scale_to_area(poly: Polygon, target_area: float) -> Polygon:
+def _scale_to_area(polys: np.ndarray, target_areas: np.ndarray) -> np.ndarray:
     """
-    Uniformly scale polygon about centroid to match target area.
+    Uniformly scale each polygon about its centroid to match its target area.
     Only SHRINK (never enlarge beyond buildable boundary).
+    Vectorized over an object array of polygons; returns a new array.
     """
-    if poly.is_empty or poly.area <= 1e-9:
-        return poly
-    if target_area <= 1e-9:
-        return poly.buffer(-1e9)  # empty-ish
+    areas = shapely.area(polys)
+    out = polys.copy()
+
+    # already small enough (or degenerate): keep as-is, no GEOS work
+    shrink = (areas > 1e-9) & (target_areas < areas)
+    if not shrink.any():
+        return out
 
-    scale = math.sqrt(min(target_area / poly.area, 1.0))
-    return affinity.scale(poly, xfact=scale, yfact=scale, origin="centroid")
+    sub = polys[shrink]
+    scale = np.sqrt(target_areas[shrink] / areas[shrink])
+
+    centers = shapely.get_coordinates(shapely.centroid(sub))
+    coords, idx = shapely.get_coordinates(sub, return_index=True)
+    c = centers[idx]
+    s = scale[idx, None]
+    out[shrink] = shapely.set_coordinates(sub.copy(), coords * s + (c - c * s))
+    return out
 
 
 # -----------------------------
@@ -110,58 +147,78 @@ def run_batch(
     max_floors: int = 60,          # ✅ 防止一棟爆高毀全圖
     fallback_bcr: float = 0.6,     # ✅ 沒有 building_r 時
     fallback_far: float = 2.5,     # ✅ 沒有 floor_r 時
+    metrics: Optional[List[Dict[str, Any]]] = None,  # precomputed parcel_metrics, one per parcel
 ) -> Dict[str, Any]:
     """
     Returns dict with:
     - rows: list of per-parcel result dicts
     - buildings: list of (pid, footprint_polygon, height, faces)
+    - metrics: the parcel_metrics used, one per parcel
+
+    Pass a previous result's `metrics` back in to reuse them across
+    several rule sets on the same parcels.
     """
     rows: List[Dict[str, Any]] = []
     buildings: List[Tuple[str, Polygon, float, Any]] = []
 
-    for pid, geom, props in parcels:
-        poly = _largest_polygon(geom)
-
-        # metrics (for csv)
-        m = parcel_metrics(poly)
-
-        # --- read from GeoJSON first; fallback to far_rule if floor_r missing ---
-        bcr = _to_ratio(props.get("building_r", fallback_bcr), default=fallback_bcr)
-
-        if "floor_r" in props and props.get("floor_r") not in (None, ""):
-            far = _to_far(props.get("floor_r"), default=fallback_far)
-        else:
-            # fallback to rule-based far (old pipeline)
-            try:
-                far = float(far_rule(m))
-            except Exception:
-                far = fallback_far
-
-        # buildable boundary with setback
-        buildable = poly.buffer(-setback) if setback else poly
-        if buildable.is_empty or buildable.area <= 1e-9:
-            buildable = poly  # fallback: no setback
-        buildable = _largest_polygon(buildable)
-
-        # footprint must match BCR, but stay inside buildable
-        plot_area = max(poly.area, 1e-9)
-        target_fp_area = plot_area * bcr
-        footprint = _scale_to_area(buildable, target_fp_area)
-
-        if footprint.is_empty or footprint.area <= 1e-9:
-            footprint = buildable
-
-        # floors from FAR using footprint area
-        total_floor_area = plot_area * far
-        fp_area = max(footprint.area, 1e-9)
-
-        floors = int(math.ceil(total_floor_area / fp_area))
-        floors = max(floors, min_floors)
-        floors = min(floors, max_floors)  # ✅ clamp
-
-        height = floors * floor_height
-
-        faces = extrude_polygon(footprint, height)
+    # MultiPolygon -> largest piece (parts under 1e-9 m² ignored)
+    polys = largest_parts((geom for _, geom, _ in parcels), min_area=1e-9)
+    n = len(polys)
+
+    # metrics (for csv); one vectorised GEOS pass over all parcels
+    if metrics is None:
+        metrics = parcel_metrics_batch(polys)
+    elif len(metrics) != n:
+        raise ValueError(f"metrics has {len(metrics)} entries for {n} parcels")
+
+    # BCR / FAR: pull both columns out once, parse them column-wise
+    props_list = [props for _, _, props in parcels]
+    bcrs = _to_ratios([p.get("building_r", fallback_bcr) for p in props_list], default=fallback_bcr)
+
+    # --- read from GeoJSON first; fallback to far_rule if floor_r missing ---
+    far_raw = [p.get("floor_r") for p in props_list]
+    has_far = np.array([v not in (None, "") for v in far_raw], dtype=bool)
+    fars = np.empty(n)
+    fars[has_far] = _to_fars([v for v, ok in zip(far_raw, has_far) if ok], default=fallback_far)
+    for i in np.flatnonzero(~has_far):
+        # fallback to rule-based far (old pipeline)
+        try:
+            fars[i] = float(far_rule(metrics[i]))
+        except Exception:
+            fars[i] = fallback_far
+
+    # buildable boundary with setback (one GEOS call for the whole batch)
+    buildables = shapely.buffer(polys, -setback, quad_segs=16) if setback else polys.copy()
+    no_room = shapely.is_empty(buildables) | (shapely.area(buildables) <= 1e-9)
+    buildables[no_room] = polys[no_room]  # fallback: no setback
+    buildables = largest_parts(buildables, min_area=1e-9)
+
+    # footprint must match BCR, but stay inside buildable
+    plot_areas = np.maximum(shapely.area(polys), 1e-9)
+    target_fp_areas = plot_areas * bcrs
+    footprints = _scale_to_area(buildables, target_fp_areas)
+
+    degenerate = (target_fp_areas <= 1e-9) | (shapely.area(footprints) <= 1e-9)
+    footprints[degenerate] = buildables[degenerate]
+
+    # floors from FAR using footprint area
+    total_floor_areas = plot_areas * fars
+    fp_areas = np.maximum(shapely.area(footprints), 1e-9)
+
+    floors = np.ceil(total_floor_areas / fp_areas).astype(int)
+    floors = np.maximum(floors, min_floors)
+    floors = np.minimum(floors, max_floors)  # ✅ clamp
+
+    heights = floors * floor_height
+
+    # one vectorized pass for all prisms (cheaper than shipping them through a pool)
+    faces_all = extrude_polygons(footprints, heights)
+
+    for i, (pid, geom, props) in enumerate(parcels):
+        poly = polys[i]
+        m = metrics[i]
+        footprint = footprints[i]
+        height = float(heights[i])
 
         row = {
             "id": pid,
@@ -169,24 +226,41 @@ def run_batch(
             "width": m.get("width"),
             "depth": m.get("depth"),
             "aspect_ratio": m.get("aspect_ratio"),
-            "building_r": bcr,
-            "floor_r": far,
+            "building_r": float(bcrs[i]),
+            "floor_r": float(fars[i]),
             "setback": setback,
             "footprint_area": footprint.area,
-            "floors": floors,
+            "floors": int(floors[i]),
             "floor_height": floor_height,
             "height": height,
         }
         rows.append(row)
-        buildings.append((pid, footprint, height, faces))
+        buildings.append((pid, footprint, height, faces_all[i]))
 
-    return {"rows": rows, "buildings": buildings}
+    return {"rows": rows, "buildings": buildings, "metrics": metrics}
+
+
+def _rows_to_table(rows: List[Dict[str, Any]]) -> "pa.Table":
+    """Columnar pyarrow table, keeping rows[0] column order."""
+    fieldnames = list(rows[0].keys()) if rows else []
+    return pa.table({k: [r[k] for r in rows] for k in fieldnames})
 
 
 def save_csv(rows: List[Dict[str, Any]], out_path: str) -> None:
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    ensure_parent(out_path)
     fieldnames = list(rows[0].keys()) if rows else []
+
+    # stdlib writer on plain tuples: same bytes as csv.DictWriter (pyarrow's CSV
+    # writer always quotes the header/strings and prints 4.0 as 4)
     with open(out_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        w.writerows(rows)
+        w = csv.writer(f)
+        w.writerow(fieldnames)
+        w.writerows([r[k] for k in fieldnames] for r in rows)
+
+
+def save_feather(rows: List[Dict[str, Any]], out_path: str) -> None:
+    """Write rows as Feather (Arrow IPC) with zstd compression. Needs pyarrow."""
+    if pa is None:
+        raise ImportError("save_feather requires pyarrow (pip install pyarrow)")
+    ensure_parent(out_path)
+    pa_feather.write_feather(_rows_to_table(rows), out_path, compression="zstd")
@@ -3,52 +3,75 @@ from typing import List, Tuple
 import numpy as np
 import trimesh
 
+from geom_utils import ensure_parent
+
 Face = List[Tuple[float, float, float]]
 Building = Tuple[str, object, float, List[Face]]
 
 def buildings_to_trimesh(buildings: List[Building]) -> trimesh.Trimesh:
-    vertices = []
-    faces = []
-    v_offset = 0
-
-    for pid, footprint, height, polys in buildings:
-        for poly in polys:
-            pts = np.array(poly, dtype=float)
-            if len(pts) < 3:
-                continue
-
-            vertices.append(pts)
-            for i in range(1, len(pts) - 1):
-                faces.append([v_offset, v_offset + i, v_offset + i + 1])
-
-            v_offset += len(pts)
-
-    V = np.vstack(vertices)
-    F = np.array(faces, dtype=int)
-
-    mesh = trimesh.Trimesh(vertices=V, faces=F, process=True)
-
-    # Make it robust across trimesh versions
-    try:
-        mesh.merge_vertices()
-    except Exception:
-        pass
-
-    try:
-        mesh.remove_unreferenced_vertices()
-    except Exception:
-        pass
-
-    return mesh
-
+    """
+    Build one mesh for all prisms straight from the footprints.
+    Each building contributes 2n vertices (bottom + top ring) and
+    2n side triangles + 2(n-2) fan-triangulated cap triangles, written
+    into preallocated arrays (no per-face Python lists).
+    """
+    rings = []
+    for pid, footprint, height, _faces in buildings:
+        ring = np.asarray(footprint.exterior.coords, dtype=float)[:-1]
+        if len(ring) >= 3:
+            rings.append((ring, float(height)))
+
+    sizes = np.array([len(r) for r, _ in rings], dtype=int)
+    V = np.empty((int(2 * sizes.sum()), 3), dtype=float)
+    F = np.empty((int((4 * sizes - 4).sum()), 3), dtype=int)
+
+    v_off = 0
+    f_off = 0
+    for ring, height in rings:
+        n = len(ring)
+        V[v_off:v_off + n, :2] = ring
+        V[v_off:v_off + n, 2] = 0.0
+        V[v_off + n:v_off + 2 * n, :2] = ring
+        V[v_off + n:v_off + 2 * n, 2] = height
+
+        i = np.arange(n)
+        j = (i + 1) % n
+        bot_i, bot_j = v_off + i, v_off + j
+        top_i, top_j = bot_i + n, bot_j + n
+
+        # side quads (b_i, b_j, t_j, t_i) -> two triangles
+        F[f_off:f_off + n] = np.column_stack([bot_i, bot_j, top_j])
+        F[f_off + n:f_off + 2 * n] = np.column_stack([bot_i, top_j, top_i])
+        f_off += 2 * n
+
+        # caps: fan from the first vertex (top wound the other way)
+        k = np.arange(1, n - 1)
+        F[f_off:f_off + n - 2] = np.column_stack([np.full(n - 2, v_off), v_off + k, v_off + k + 1])
+        f_off += n - 2
+        t0 = v_off + 2 * n - 1
+        F[f_off:f_off + n - 2] = np.column_stack([np.full(n - 2, t0), t0 - k, t0 - k - 1])
+        f_off += n - 2
+
+        v_off += 2 * n
+
+    # prisms never share vertices, so skip trimesh's merge/cleanup passes
+    return trimesh.Trimesh(vertices=V, faces=F, process=False, validate=False)
+
+
+
+def _write_obj(V: np.ndarray, F: np.ndarray, out_path: str) -> None:
+    """Plain ASCII OBJ (1-based faces); one %-format call per block."""
+    ensure_parent(out_path)
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(("v %.8f %.8f %.8f\n" * len(V)) % tuple(V.ravel().tolist()))
+        f.write(("f %d %d %d\n" * len(F)) % tuple((F + 1).ravel().tolist()))
 
 
 def export_obj(buildings, out_path: str, show: bool = False):
     mesh = buildings_to_trimesh(buildings)
-    mesh.export(out_path)
+    _write_obj(mesh.vertices, mesh.faces, out_path)
 
     if show:
         mesh.show()  
 
     print(f"3D exported: {out_path}")
-
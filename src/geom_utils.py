@@ -0,0 +1,55 @@
+"""
+geom_utils.py
+
+Shapely/numpy-only helpers shared by the loader, the batch pipeline, the
+exporters and the plotting modules (no matplotlib import here).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import shapely
+
+
+_ENSURED: set[str] = set()  # output dirs already created this session
+
+
+def ensure_parent(out_path: str) -> None:
+    """mkdir -p the parent of out_path, once per directory per session."""
+    d = str(Path(out_path).parent)
+    if d not in _ENSURED:
+        Path(d).mkdir(parents=True, exist_ok=True)
+        _ENSURED.add(d)
+
+
+def largest_parts(geoms, min_area: Optional[float] = None, *, strict: bool = True) -> np.ndarray:
+    """
+    Replace every MultiPolygon in `geoms` by its largest part (ties keep the
+    first part, like max()); other entries are returned as they are.
+    Parts with area <= min_area are ignored (None: keep all parts). A
+    MultiPolygon left with no part raises (strict) or becomes None.
+    One get_parts + area call for the whole array; returns a new object array.
+    """
+    out = np.array(list(geoms), dtype=object)
+    multi_idx = np.flatnonzero(shapely.get_type_id(out) == shapely.GeometryType.MULTIPOLYGON)
+    if not len(multi_idx):
+        return out
+
+    parts, parent = shapely.get_parts(out[multi_idx], return_index=True)
+    areas = shapely.area(parts)
+    if min_area is not None:
+        keep = areas > min_area
+        parts, parent, areas = parts[keep], parent[keep], areas[keep]
+
+    # largest part per parent (stable sort: ties keep the first part)
+    order = np.lexsort((-areas, parent))
+    found, first = np.unique(parent[order], return_index=True)
+    if strict and len(found) < len(multi_idx):
+        raise ValueError("MultiPolygon has no non-empty parts.")
+
+    out[multi_idx] = None
+    out[multi_idx[found]] = parts[order[first]]
+    return out
@@ -1,56 +1,90 @@
 import json
+from collections import Counter
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Iterator
 
-from shapely.geometry import shape, Polygon, MultiPolygon
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+from shapely.geometry.base import BaseGeometry
+
+from geom_utils import largest_parts
+
+try:
+    import orjson
+except ImportError:  # optional: faster parser, falls back to stdlib json
+    orjson = None
+
+
+def _json_loads(raw: bytes) -> Any:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw.decode("utf-8"))
+
+
+def _json_dumps(obj: Any) -> str | bytes:
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj)
+
+
+def _iter_geojson(p: Path) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """Yield (geometry dict, properties) per feature (orjson when installed, else json)."""
+    data = _json_loads(p.read_bytes())
+    for f in data.get("features", []):
+        yield f.get("geometry"), f.get("properties", {}) or {}
+
+
+def _iter_geo_table(p: Path) -> Iterator[Tuple[BaseGeometry, Dict[str, Any]]]:
+    """Yield (shapely geometry, properties) from a GeoParquet / Feather file."""
+    import geopandas  # only needed for columnar parcel inputs
+
+    if p.suffix.lower() == ".parquet":
+        gdf = geopandas.read_parquet(p)
+    else:
+        gdf = geopandas.read_feather(p)
+
+    geom_col = gdf.geometry.name
+    props_df = gdf.drop(columns=geom_col)
+    # missing values come back as NaN; GeoJSON gives None, which run_batch treats as absent
+    props_df = props_df.astype(object).where(props_df.notna(), None)
+    for geom, props in zip(gdf.geometry, props_df.to_dict("records")):
+        yield geom, props
 
 
 def load_parcels_geojson(path: str) -> List[Tuple[str, Polygon, Dict[str, Any]]]:
     """
     Load parcel polygons from GeoJSON. Supports Polygon and MultiPolygon.
     For MultiPolygon, we keep the largest polygon (by area).
+    .parquet / .feather inputs (GeoParquet / GeoFeather) are read via geopandas.
     Returns list of (parcel_id, polygon, properties).
     """
     p = Path(path)
-    data = json.loads(p.read_text(encoding="utf-8"))
-
-    feats = data.get("features", [])
-    out: List[Tuple[str, Polygon, Dict[str, Any]]] = []
-
-    type_counter: Dict[str, int] = {}
+    columnar = p.suffix.lower() in (".parquet", ".feather")
+    features = list(_iter_geo_table(p) if columnar else _iter_geojson(p))
 
-    for i, f in enumerate(feats):
-        geom = f.get("geometry")
-        props = f.get("properties", {}) or {}
-        if not geom:
-            continue
-
-        g = shape(geom)
-        gtype = g.geom_type
-        type_counter[gtype] = type_counter.get(gtype, 0) + 1
-
-        poly: Polygon | None = None
+    # build all geometries in one call (GeoJSON -> GEOS in C)
+    if columnar:
+        geoms = np.array([g if g else None for g, _ in features], dtype=object)
+    else:
+        geoms = shapely.from_geojson(
+            np.array([_json_dumps(g) if g else None for g, _ in features], dtype=object)
+        )
 
-        if isinstance(g, Polygon):
-            poly = g
-        elif isinstance(g, MultiPolygon):
-            # pick the largest piece
-            parts = list(g.geoms)
-            parts.sort(key=lambda x: x.area, reverse=True)
-            poly = parts[0] if parts else None
-        else:
-            # skip non-area geometry
-            continue
+    # Polygon as-is; MultiPolygon -> largest piece (ties keep the first part)
+    type_ids = shapely.get_type_id(geoms)
+    polys = largest_parts(geoms, strict=False)
+    polys[(type_ids != shapely.GeometryType.POLYGON) & (type_ids != shapely.GeometryType.MULTIPOLYGON)] = None
 
-        if poly is None or poly.is_empty or poly.area <= 1e-9:
-            continue
+    ok = ~shapely.is_missing(polys)
+    ok[ok] = ~shapely.is_empty(polys[ok]) & (shapely.area(polys[ok]) > 1e-9)
 
-        pid = str(props.get("id", props.get("ID", i)))
-        out.append((pid, poly, props))
+    out: List[Tuple[str, Polygon, Dict[str, Any]]] = []
+    for i in np.flatnonzero(ok):
+        props = features[i][1]
+        pid = str(props.get("id", props.get("ID", int(i))))
+        out.append((pid, polys[i], props))
 
     if not out:
+        type_counter = Counter(g.geom_type for g in geoms if g is not None)
         raise ValueError(
-            f"No Polygon/MultiPolygon found. Geometry types in file: {type_counter}"
+            f"No Polygon/MultiPolygon found. Geometry types in file: {dict(type_counter)}"
         )
 
     return out
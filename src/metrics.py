@@ -1,7 +1,50 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+import shapely
 from shapely.geometry import Polygon
 
 
+def parcel_metrics_batch(polys: Sequence[Polygon]) -> List[Dict[str, Any]]:
+    """
+    parcel_metrics for a whole array of polygons, one GEOS call per indicator
+    (area, centroid, oriented_envelope) instead of one Python loop per parcel.
+    """
+    polys = np.asarray(polys, dtype=object)
+    if not len(polys):
+        return []
+    areas = shapely.area(polys)
+    cxy = shapely.get_coordinates(shapely.centroid(polys))
+
+    # minimum rotated rectangle approximates parcel dimensions robustly
+    env = shapely.oriented_envelope(polys)
+    e0 = shapely.length(env)  # degenerate (line/point) envelope
+    e1 = np.zeros(len(polys))
+    is_rect = shapely.get_type_id(env) == shapely.GeometryType.POLYGON
+    if is_rect.any():
+        c = shapely.get_coordinates(env[is_rect]).reshape(-1, 5, 2)
+        d = np.diff(c[:, :3], axis=1)  # edges 0-1, 1-2
+        side = np.sqrt(d[..., 0] * d[..., 0] + d[..., 1] * d[..., 1])
+        e0[is_rect], e1[is_rect] = side[:, 0], side[:, 1]
+
+    widths = np.maximum(e0, e1)
+    depths = np.minimum(e0, e1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aspects = np.where(depths > 1e-9, widths / depths, np.inf)
+
+    return [
+        {
+            "area": float(areas[i]),
+            "centroid_x": float(cxy[i, 0]),
+            "centroid_y": float(cxy[i, 1]),
+            "width": float(widths[i]),
+            "depth": float(depths[i]),
+            "aspect_ratio": float(aspects[i]),
+        }
+        for i in range(len(polys))
+    ]
+
+
 def parcel_metrics(poly: Polygon) -> Dict[str, Any]:
     """
     Basic geometry indicators:
@@ -9,32 +52,4 @@ def parcel_metrics(poly: Polygon) -> Dict[str, Any]:
     - width / depth from minimum rotated rectangle (MRR)
     - aspect_ratio = longer/shorter
     """
-    area = float(poly.area)
-    cen = poly.centroid
-    cx, cy = float(cen.x), float(cen.y)
-
-    # minimum rotated rectangle approximates parcel dimensions robustly
-    mrr = poly.minimum_rotated_rectangle
-    coords = list(mrr.exterior.coords)[:-1]  # 4 points
-
-    def dist(a, b):
-        dx = a[0] - b[0]
-        dy = a[1] - b[1]
-        return (dx * dx + dy * dy) ** 0.5
-
-    # rectangle edges: (0-1,1-2,2-3,3-0)
-    e0 = dist(coords[0], coords[1])
-    e1 = dist(coords[1], coords[2])
-
-    width = float(max(e0, e1))
-    depth = float(min(e0, e1))
-    aspect = float(width / depth) if depth > 1e-9 else float("inf")
-
-    return {
-        "area": area,
-        "centroid_x": cx,
-        "centroid_y": cy,
-        "width": width,
-        "depth": depth,
-        "aspect_ratio": aspect,
-    }
+    return parcel_metrics_batch([poly])[0]
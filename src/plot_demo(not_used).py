@@ -1,3 +1,4 @@
+import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 from shapely.geometry import MultiPolygon
@@ -5,7 +6,6 @@ from shapely.geometry import MultiPolygon
 from io_geojson import load_parcels_geojson
 from batch_massing import run_batch
 from rules import far_rule_area  # 你現在 run_b.py 用的那個 rule
-from volume_generator import extrude_polygon
 
 def plot_base(ax, parcels):
     # 2D 底圖：地塊外框 + 淡填色 (z=0)
@@ -14,44 +14,45 @@ def plot_base(ax, parcels):
         if isinstance(g, MultiPolygon):
             g = max(list(g.geoms), key=lambda x: x.area)
 
-        x, y = g.exterior.coords.xy
-        ax.plot(x, y, zs=0.0, color="0.4", linewidth=0.8, alpha=0.9)
+        coords = np.asarray(g.exterior.coords)
+        ax.plot(coords[:, 0], coords[:, 1], zs=0.0, color="0.4", linewidth=0.8, alpha=0.9)
 
-        coords = list(zip(x, y))[:-1]
-        face0 = [(xx, yy, 0.0) for (xx, yy) in coords]
+        ring = coords[:-1, :2]
+        face0 = np.column_stack([ring, np.zeros(len(ring))])
         ax.add_collection3d(
             Poly3DCollection([face0], facecolors="0.9", edgecolors="none", alpha=0.12)
         )
 
 def plot_buildings(ax, buildings):
-    heights = [h for (_, _, h, _) in buildings]
-    hmin, hmax = min(heights), max(heights)
+    heights = np.fromiter((b[2] for b in buildings), dtype=np.float64, count=len(buildings))
+    hmin, hmax = heights.min(), heights.max()
 
     cmap = plt.cm.viridis
     norm = plt.Normalize(vmin=hmin, vmax=hmax)
 
-    all_x, all_y, all_z = [], [], []
+    bmin = np.full(3, np.inf)
+    bmax = np.full(3, -np.inf)
 
     for pid, footprint, height, faces in buildings:
         color = cmap(norm(height))
         poly = Poly3DCollection(
             faces, facecolors=color, edgecolor="k", alpha=0.85, linewidths=0.25
         )
-        ax.add_collection3d(poly)
+        ax.add_collection3d(poly, autolim=False)  # 範圍下面自己設
 
-        for face in faces:
-            for x, y, z in face:
-                all_x.append(x); all_y.append(y); all_z.append(z)
+        pts = np.concatenate(faces)
+        bmin = np.minimum(bmin, pts.min(axis=0))
+        bmax = np.maximum(bmax, pts.max(axis=0))
 
     # bounds
     pad = 1.0
-    ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-    ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-    ax.set_zlim(0.0, max(all_z) + pad)
+    ax.set_xlim(bmin[0] - pad, bmax[0] + pad)
+    ax.set_ylim(bmin[1] - pad, bmax[1] + pad)
+    ax.set_zlim(0.0, bmax[2] + pad)
 
-    dx = max(all_x) - min(all_x)
-    dy = max(all_y) - min(all_y)
-    dz = max(all_z)
+    dx = bmax[0] - bmin[0]
+    dy = bmax[1] - bmin[1]
+    dz = bmax[2]
     ax.set_box_aspect([max(dx, 1e-6), max(dy, 1e-6), max(dz, 1e-6)])
 
     # colorbar 圖例
@@ -65,12 +66,8 @@ def main():
     parcels = load_parcels_geojson(geojson_path)
     out = run_batch(parcels, far_rule_area, setback=0.5, floor_height=3.6)
 
-    # buildings 的 faces 如果你存的不是 faces，就在這裡重算一次
-    buildings = []
-    for pid, fp, h, faces in out["buildings"]:
-        if faces is None:
-            faces = extrude_polygon(fp, h)
-        buildings.append((pid, fp, h, faces))
+    # run_batch 已經算好每棟的 faces，直接沿用
+    buildings = out["buildings"]
 
     fig = plt.figure(figsize=(11, 8))
     ax = fig.add_subplot(111, projection="3d")
@@ -1,16 +1,21 @@
 from typing import Dict, Any
 
+import numpy as np
+
+
+# Rule set A tiers: area < 600 -> 1.8, < 1200 -> 2.6, < 2500 -> 3.2, else 4.0
+_AREA_BINS = np.array([600.0, 1200.0, 2500.0])
+_AREA_FAR = np.array([1.8, 2.6, 3.2, 4.0])
+
 
 def far_rule_area(m: Dict[str, Any]) -> float:
     """Rule set A: FAR by parcel area tiers."""
-    a = m["area"]
-    if a < 600:
-        return 1.8
-    if a < 1200:
-        return 2.6
-    if a < 2500:
-        return 3.2
-    return 4.0
+    return float(_AREA_FAR[np.searchsorted(_AREA_BINS, m["area"], side="right")])
+
+
+def far_rule_area_vec(areas: np.ndarray) -> np.ndarray:
+    """Rule set A for many parcels at once (array of areas -> array of FAR)."""
+    return _AREA_FAR[np.searchsorted(_AREA_BINS, np.asarray(areas, dtype=float), side="right")]
 
 
 def far_rule_frontage(m: Dict[str, Any]) -> float:
@@ -29,3 +34,10 @@ def far_rule_frontage(m: Dict[str, Any]) -> float:
         return 2.0
 
     return 2.6
+
+
+def far_rule_frontage_vec(widths: np.ndarray, aspect_ratios: np.ndarray) -> np.ndarray:
+    """Rule set B for many parcels at once; same precedence as far_rule_frontage."""
+    w = np.asarray(widths, dtype=float)
+    ar = np.asarray(aspect_ratios, dtype=float)
+    return np.select([w >= 30, w >= 20, ar >= 3.5], [4.0, 3.2, 2.0], default=2.6)
@@ -6,13 +6,19 @@ AI assistance prompt (for course transparency):
    applies rule-based FAR, and generates 2.5D massing outputs with Shapely and Matplotlib."
 """
 
+import argparse
+
 from io_geojson import load_parcels_geojson
 from rules import far_rule_area, far_rule_frontage
-from batch_massing import run_batch, save_csv
+from batch_massing import run_batch, save_csv, save_feather
 from viz2d import plot_height_map
 
 
-def main():
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Batch massing (B-side runner)")
+    ap.add_argument("--csv", action="store_true", help="also write result tables as CSV")
+    args = ap.parse_args(argv)
+
     # TODO: change this to your real file path
     geojson_path = "data/parcels.geojson"
 
@@ -20,17 +26,21 @@ def main():
 
     # Rule set A
     out_a = run_batch(parcels, far_rule_area, setback=0.5, floor_height=3.6)
-    save_csv(out_a["rows"], "outputs/result_rule_area.csv")
+    save_feather(out_a["rows"], "outputs/result_rule_area.feather")
+    if args.csv:
+        save_csv(out_a["rows"], "outputs/result_rule_area.csv")
     buildings_a = [(pid, poly, h) for (pid, poly, h, _faces) in out_a["buildings"]]
     plot_height_map(buildings_a, "outputs/height_map_rule_area.png", "Height map (Rule A: FAR by area)")
 
-    # Rule set B
-    out_b = run_batch(parcels, far_rule_frontage, setback=0.5, floor_height=3.6)
-    save_csv(out_b["rows"], "outputs/result_rule_frontage.csv")
+    # Rule set B (parcel metrics only depend on geometry: reuse rule A's)
+    out_b = run_batch(parcels, far_rule_frontage, setback=0.5, floor_height=3.6, metrics=out_a["metrics"])
+    save_feather(out_b["rows"], "outputs/result_rule_frontage.feather")
+    if args.csv:
+        save_csv(out_b["rows"], "outputs/result_rule_frontage.csv")
     buildings_b = [(pid, poly, h) for (pid, poly, h, _faces) in out_b["buildings"]]
     plot_height_map(buildings_b, "outputs/height_map_rule_frontage.png", "Height map (Rule B: FAR by frontage/shape)")
 
-    print("Done. Check outputs/ for PNG + CSV.")
+    print("Done. Check outputs/ for PNG + Feather (+ CSV with --csv).")
 
     # ---- 3D batch view (keep ONLY this window) ----
     from viz3d import plot_site_massing_3d
@@ -2,6 +2,7 @@ from pathlib import Path
 from typing import List, Tuple
 
 import matplotlib.pyplot as plt
+import numpy as np
 from shapely.geometry import Polygon
 
 
@@ -15,8 +16,8 @@ def plot_height_map(
     """
     Path(out_png).parent.mkdir(parents=True, exist_ok=True)
 
-    heights = [h for _, _, h in buildings]
-    hmax = max(heights) if heights else 1.0
+    heights = np.fromiter((b[2] for b in buildings), dtype=np.float64, count=len(buildings))
+    hmax = heights.max() if len(heights) else 1.0
 
     fig, ax = plt.subplots(figsize=(10, 8))
     for pid, poly, h in buildings:
@@ -1,9 +1,9 @@
 # src/viz3d.py
+import numpy as np
 import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
-from shapely.geometry import MultiPolygon
 
-from volume_generator import extrude_polygon
+from geom_utils import largest_parts
 
 
 def plot_site_massing_3d(
@@ -21,6 +21,7 @@ def plot_site_massing_3d(
     """
     parcels: [(pid, geom, props), ...] from load_parcels_geojson
     buildings: [(pid, footprint, height, faces), ...] from run_batch
+               (faces must already be extruded; run_batch does this once)
 
     - draws parcel outlines as base map at z=0
     - draws extruded buildings colored by height
@@ -35,56 +36,55 @@ def plot_site_massing_3d(
     ax = fig.add_subplot(111, projection="3d")
 
     # ---- 1) base map (parcel outlines + faint fill at z=0) ----
-    for pid, geom, props in parcels:
-        g = geom
-        if isinstance(g, MultiPolygon):
-            g = max(list(g.geoms), key=lambda x: x.area)
+    fills = []
+    for g in largest_parts((geom for _, geom, _ in parcels), strict=False):
+        coords = np.asarray(g.exterior.coords)
+        ax.plot(coords[:, 0], coords[:, 1], zs=0.0, color="0.4", linewidth=0.8, alpha=0.9)
 
-        x, y = g.exterior.coords.xy
-        ax.plot(x, y, zs=0.0, color="0.4", linewidth=0.8, alpha=0.9)
+        ring = coords[:-1, :2]
+        fills.append(np.column_stack([ring, np.zeros(len(ring))]))
 
-        coords = list(zip(x, y))[:-1]
-        face0 = [(xx, yy, 0.0) for (xx, yy) in coords]
+    # every (n,3) face0 array goes straight into one collection
+    if fills:
         ax.add_collection3d(
-            Poly3DCollection([face0], facecolors="0.9", edgecolors="none", alpha=0.12)
+            Poly3DCollection(fills, facecolors="0.9", edgecolors="none", alpha=0.12),
+            autolim=False,
         )
 
     # ---- 2) buildings ----
-    heights = [h for (_, _, h, _faces) in buildings]
-    if not heights:
+    heights = np.fromiter((b[2] for b in buildings), dtype=np.float64, count=len(buildings))
+    if not len(heights):
         raise ValueError("No buildings to plot.")
 
-    hmin, hmax = min(heights), max(heights)
+    hmin, hmax = heights.min(), heights.max()
     cmap = plt.cm.viridis
     norm = plt.Normalize(vmin=hmin, vmax=hmax)
 
-    all_x, all_y, all_z = [], [], []
+    # one collection for every face of every building (one artist, one depth sort)
+    all_faces = [f for (_, _, _, faces) in buildings for f in faces]
+    counts = [len(faces) for (_, _, _, faces) in buildings]
+    colors = cmap(norm(np.repeat(heights, counts)))
 
-    for pid, footprint, height, faces in buildings:
-        if faces is None:
-            faces = extrude_polygon(footprint, height)
+    poly = Poly3DCollection(
+        all_faces, facecolors=colors, edgecolor="k", alpha=0.85, linewidths=0.25
+    )
+    # limits are set explicitly below; autolim would scan matplotlib's
+    # padded (uninitialised) buffer for ragged faces -> NaN/Inf limits
+    ax.add_collection3d(poly, autolim=False)
 
-        color = cmap(norm(height))
-        poly = Poly3DCollection(
-            faces, facecolors=color, edgecolor="k", alpha=0.85, linewidths=0.25
-        )
-        ax.add_collection3d(poly)
-
-        for face in faces:
-            for x, y, z in face:
-                all_x.append(x)
-                all_y.append(y)
-                all_z.append(z)
+    pts = np.concatenate(all_faces)
+    bmin = pts.min(axis=0)
+    bmax = pts.max(axis=0)
 
     # ---- 3) bounds + view ----
     pad = 1.0
-    ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-    ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-    ax.set_zlim(0.0, max(all_z) + pad)
+    ax.set_xlim(bmin[0] - pad, bmax[0] + pad)
+    ax.set_ylim(bmin[1] - pad, bmax[1] + pad)
+    ax.set_zlim(0.0, bmax[2] + pad)
 
-    dx = max(all_x) - min(all_x)
-    dy = max(all_y) - min(all_y)
-    dz = max(all_z)
+    dx = bmax[0] - bmin[0]
+    dy = bmax[1] - bmin[1]
+    dz = bmax[2]
     ax.set_box_aspect([max(dx, 1e-6), max(dy, 1e-6), max(dz, 1e-6)])
 
     ax.view_init(elev=elev, azim=azim)
@@ -12,120 +12,45 @@ Pipeline idea:
 
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable, List, Tuple, Optional
+from functools import lru_cache, partial
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple, Optional
+import os
 
+import matplotlib as mpl
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+import shapely
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
 from shapely.geometry import Polygon, MultiPolygon
 from shapely.geometry.base import BaseGeometry
 
-import matplotlib as mpl
-
 import numpy as np
-from shapely.geometry import Polygon, MultiPolygon
 
-def plot_batch_volumes(
-    buildings,
-    *,
-    base_parcels=None,   # optional: list of (pid, polygon, props) from GeoJSON
-    title: str = "Batch Massing",
-    show: bool = True,
-    save_path: str | None = None,
-    ax=None,
-):
-    """
-    buildings: list of (pid, footprint_polygon, height, faces)
-    base_parcels: list of (pid, polygon, props) to draw as 2D base map
-    """
-    if ax is None:
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111, projection="3d")
-    else:
-        fig = ax.get_figure()
+from geom_utils import largest_parts
 
-    # ---- 1) draw base map (2D parcels on z=0) ----
-    if base_parcels is not None:
-        for pid, geom, props in base_parcels:
-            g = geom
-            if isinstance(g, MultiPolygon):
-                g = max(list(g.geoms), key=lambda x: x.area)
-
-            x, y = g.exterior.coords.xy
-            ax.plot(x, y, zs=0.0, color="0.4", linewidth=0.8, alpha=0.9)
-
-            # optional: light fill using a thin "polygon" face at z=0
-            coords2d = list(zip(x, y))[:-1]
-            face0 = [(xx, yy, 0.0) for (xx, yy) in coords2d]
-            ax.add_collection3d(
-                Poly3DCollection([face0], facecolors="0.9", edgecolors="none", alpha=0.15)
-            )
-
-    # ---- 2) draw buildings with height colormap ----
-    heights = [h for (_, _, h, _) in buildings]
-    hmin, hmax = (min(heights), max(heights)) if heights else (0.0, 1.0)
-    cmap = plt.cm.viridis
-    norm = plt.Normalize(vmin=hmin, vmax=hmax)
-
-    all_x, all_y, all_z = [], [], []
-
-    for pid, footprint, height, faces in buildings:
-        color = cmap(norm(height))
-        poly = Poly3DCollection(faces, facecolors=color, edgecolor="k", alpha=0.85, linewidths=0.3)
-        ax.add_collection3d(poly)
-
-        # --- ADD COLORBAR (Height Legend) ---
-        norm = mpl.colors.Normalize(vmin=0, vmax=height)
-        sm = mpl.cm.ScalarMappable(cmap=plt.cm.viridis, norm=norm)
-        sm.set_array([])
 
-        cbar = ax.get_figure().colorbar(
-            sm,
-            ax=ax,
-            fraction=0.03,
-            pad=0.1
-        )
-        cbar.set_label("Building Height (m)")
-
-
-        for face in faces:
-            for x, y, z in face:
-                all_x.append(x)
-                all_y.append(y)
-                all_z.append(z)
-
-    # ---- 3) bounds + aspect ----
-    if all_x and all_y:
-        pad = 1.0
-        ax.set_xlim(min(all_x) - pad, max(all_x) + pad)
-        ax.set_ylim(min(all_y) - pad, max(all_y) + pad)
-        ax.set_zlim(0.0, (max(all_z) if all_z else 1.0) + pad)
-
-        dx = max(all_x) - min(all_x)
-        dy = max(all_y) - min(all_y)
-        dz = max(all_z) if all_z else 1.0
-        ax.set_box_aspect([max(dx, 1e-6), max(dy, 1e-6), max(dz, 1e-6)])
-
-    ax.set_title(title)
-    ax.set_xlabel("X")
-    ax.set_ylabel("Y")
-    ax.set_zlabel("Z")
-
-    # ---- 4) legend (colorbar) ----
-    sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-    sm.set_array([])
-    cbar = fig.colorbar(sm, ax=ax, shrink=0.6, pad=0.02)
-    cbar.set_label("Building Height(m)")
-
-    fig.tight_layout()
-
-    if save_path is not None:
-        fig.savefig(save_path, dpi=160)
+# height -> color for plot_batch_volumes, shared by every call (see set_height_cmap)
+_HEIGHT_CMAP = plt.cm.viridis
+_HEIGHT_NORM = mpl.colors.Normalize(vmin=0.0, vmax=80.0, clip=True)
 
-    if show:
-        plt.show()
 
-    return ax
+def set_height_cmap(cmap=None, *, vmin: Optional[float] = None, vmax: Optional[float] = None) -> None:
+    """
+    Change the building height colors of plot_batch_volumes.
+    cmap: Colormap or registered name; vmin/vmax (m) update the shared norm in place.
+    """
+    global _HEIGHT_CMAP
+    if cmap is not None:
+        _HEIGHT_CMAP = mpl.colormaps[cmap] if isinstance(cmap, str) else cmap
+    if vmin is not None:
+        _HEIGHT_NORM.vmin = vmin
+    if vmax is not None:
+        _HEIGHT_NORM.vmax = vmax
 
 
 @dataclass
@@ -158,6 +83,20 @@ def _largest_polygon(geom: BaseGeometry) -> Polygon:
     raise ValueError(f"Unsupported geometry type for extrusion: {type(geom)}")
 
 
+def _largest_polygons(geoms) -> np.ndarray:
+    """_largest_polygon over many geometries (vectorized, same errors)."""
+    geoms = np.array(list(geoms), dtype=object)
+    if np.any(shapely.is_missing(geoms) | shapely.is_empty(geoms)):
+        raise ValueError("Empty geometry (cannot extrude).")
+
+    type_ids = shapely.get_type_id(geoms)
+    bad = (type_ids != shapely.GeometryType.MULTIPOLYGON) & (type_ids != shapely.GeometryType.POLYGON)
+    if bad.any():
+        raise ValueError(f"Unsupported geometry type for extrusion: {type(geoms[bad][0])}")
+
+    return largest_parts(geoms, min_area=0.0)
+
+
 def compute_buildable_volume(
     polygon: BaseGeometry,
     far: float,
@@ -202,79 +141,338 @@ def compute_buildable_volume(
     )
 
 
-def extrude_polygon(geom: BaseGeometry, height: float) -> List[List[Tuple[float, float, float]]]:
-    """Extrude a (Multi)Polygon into 3D faces for Matplotlib Poly3DCollection."""
+@dataclass
+class VolumeBatch:
+    """compute_buildable_volumes output: one entry per parcel, as arrays."""
+    buildable_polygons: np.ndarray  # object array of geometries
+    heights: np.ndarray
+    floor_counts: np.ndarray
+    buildable_areas: np.ndarray
+    empty: np.ndarray  # True where the footprint vanished (heights etc. are 0 there)
+
+
+def compute_buildable_volumes(
+    polys: np.ndarray,
+    fars: float | np.ndarray,
+    *,
+    setback: float = 0.0,
+    floor_height: float = 3.0,
+    min_floors: int = 1,
+) -> VolumeBatch:
+    """
+    Vectorized compute_buildable_volume over an array of parcels.
+    Instead of raising per parcel, empty parcels / footprints emptied by the
+    setback are flagged in `empty`; the caller decides what to do with them.
+    """
+    polys = np.asarray(polys, dtype=object)
+    fars = np.broadcast_to(np.asarray(fars, dtype=float), polys.shape)
+    if np.any(fars <= 0):
+        raise ValueError("FAR must be positive")
+    if floor_height <= 0:
+        raise ValueError("floor_height must be positive")
+    if min_floors < 1:
+        raise ValueError("min_floors must be >= 1")
+
+    # setback: negative buffer shrinks polygon (inward); quad_segs matches Polygon.buffer
+    buildables = shapely.buffer(polys, -setback, quad_segs=16) if setback else polys.copy()
+
+    plot_areas = shapely.area(polys)
+    buildable_areas = shapely.area(buildables)
+    empty = (
+        shapely.is_missing(polys) | shapely.is_empty(polys)
+        | shapely.is_missing(buildables) | shapely.is_empty(buildables)
+        | ~(buildable_areas > 1e-9)
+    )
+
+    # floors = total allowable floor area / footprint area
+    total_floor_areas = np.where(empty, 0.0, plot_areas * fars)
+    safe_areas = np.where(empty, 1.0, buildable_areas)
+    floors = np.floor_divide(total_floor_areas, safe_areas).astype(np.int64)
+    floors = np.maximum(floors, min_floors)
+    floors[empty] = 0
+
+    return VolumeBatch(
+        buildable_polygons=buildables,
+        heights=floors * floor_height,
+        floor_counts=floors,
+        buildable_areas=np.where(empty, 0.0, buildable_areas),
+        empty=empty,
+    )
+
+
+def extrude_polygon_arrays(
+    geom: BaseGeometry, height: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Prism of a (Multi)Polygon as plain arrays: bottom (n,3), top (n,3) and
+    side quads (n,4,3), each side wound (b_i, b_j, t_j, t_i).
+    """
     if height <= 0:
         raise ValueError("height must be positive")
 
     poly = _largest_polygon(geom)
 
     # Exterior ring only (ignore holes for now: quick massing)
-    x_coords, y_coords = poly.exterior.coords.xy
-    coords2d = list(zip(x_coords, y_coords))[:-1]  # drop closing point
+    coords2d = np.asarray(poly.exterior.coords, dtype=float)[:-1, :2]  # drop closing point
+    n = len(coords2d)
 
-    if len(coords2d) < 3:
+    if n < 3:
         raise ValueError("Polygon exterior has fewer than 3 vertices")
 
-    bottom = [(x, y, 0.0) for x, y in coords2d]
-    top = [(x, y, height) for x, y in coords2d]
+    return _build_sides(coords2d, np.zeros(n, dtype=np.intp), np.array([float(height)]))
 
-    faces: List[List[Tuple[float, float, float]]] = []
-    faces.append(bottom)
-    faces.append(top[::-1])
 
-    n = len(coords2d)
-    for i in range(n):
-        j = (i + 1) % n
-        faces.append([bottom[i], bottom[j], top[j], top[i]])
+def _build_sides(
+    coords: np.ndarray, ring_idx: np.ndarray, heights: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Prism arrays for many rings in one pass. coords (m,2) holds every ring's
+    vertices back to back (no closing points), ring_idx (m,) the ring each
+    vertex belongs to (non-decreasing), heights one per ring.
+    Returns bottom (m,3), top (m,3), sides (m,4,3) in the same vertex order.
+    """
+    m = len(coords)
+    starts = np.flatnonzero(np.r_[True, ring_idx[1:] != ring_idx[:-1]])
+    ends = np.r_[starts[1:], m] - 1
+
+    # next vertex along each ring, wrapping the last one back to the first
+    j = np.arange(1, m + 1)
+    j[ends] = starts
+
+    bottom = np.column_stack([coords, np.zeros(m)])
+    top = np.column_stack([coords, heights[ring_idx]])
+    sides = np.stack([bottom, bottom[j], top[j], top], axis=1)
+    return bottom, top, sides
+
+
+def _cap_triangles(geom: BaseGeometry) -> np.ndarray:
+    """
+    Triangulate the exterior ring of the polygon extrude_polygon_arrays uses
+    (holes ignored, same as the prism). Returns (T,3,2), each triangle wound
+    like the ring so the bottom/top caps keep their facing.
+    """
+    shell = Polygon(_largest_polygon(geom).exterior)
+    if hasattr(shapely, "constrained_delaunay_triangles"):  # shapely >= 2.1
+        tris = shapely.get_parts(shapely.constrained_delaunay_triangles(shell))
+    else:
+        # plain Delaunay covers the convex hull: drop triangles outside the ring
+        tris = shapely.get_parts(shapely.delaunay_triangles(shell))
+        tris = tris[shapely.contains(shell, shapely.centroid(tris))]
+
+    tri = shapely.get_coordinates(tris).reshape(-1, 4, 2)[:, :3]  # drop closing point
 
+    # flip triangles whose orientation differs from the ring's
+    def _signed_area(p):
+        x, y = p[..., 0], p[..., 1]
+        return (x * (np.roll(y, -1, axis=-1) - np.roll(y, 1, axis=-1))).sum(axis=-1)
+
+    ring = np.asarray(shell.exterior.coords, dtype=float)[:-1]
+    flip = np.sign(_signed_area(tri)) != np.sign(_signed_area(ring))
+    tri[flip] = tri[flip, ::-1]
+    return tri
+
+
+def extrude_polygon(
+    geom: BaseGeometry, height: float, *, triangulate_caps: bool = False
+) -> List[np.ndarray]:
+    """
+    Extrude a (Multi)Polygon into 3D faces for Matplotlib Poly3DCollection.
+
+    Returns [bottom (n,3), top (n,3), side quads (4,3) ...] as ndarrays
+    (views into extrude_polygon_arrays' output, no per-vertex tuples);
+    Poly3DCollection takes them as-is.
+    triangulate_caps=True replaces each n-gon cap with (3,3) triangles, which
+    depth-sort correctly for non-convex footprints.
+    """
+    bottom, top, sides = extrude_polygon_arrays(geom, height)
+    if triangulate_caps:
+        tri = _cap_triangles(geom)
+        t = len(tri)
+        caps = np.empty((2 * t, 3, 3))
+        caps[:t, :, :2] = tri
+        caps[:t, :, 2] = 0.0
+        caps[t:, :, :2] = tri[:, ::-1]
+        caps[t:, :, 2] = float(height)
+        faces: List[np.ndarray] = list(caps)
+    else:
+        faces = [bottom, top[::-1]]
+    faces.extend(sides)
     return faces
 
 
+@lru_cache(maxsize=1024)
+def _extrude_wkb(wkb: bytes, height: float) -> Tuple[np.ndarray, ...]:
+    faces = extrude_polygon(shapely.from_wkb(wkb), height)
+    for f in faces:
+        f.flags.writeable = False  # shared by every cache hit
+    return tuple(faces)
+
+
+def extrude_polygon_cached(geom: BaseGeometry, height: float) -> List[np.ndarray]:
+    """
+    extrude_polygon memoised on (WKB, height) for sweeps that re-extrude the
+    same footprints (FAR scenarios). Keyed on content, not id(). Returned
+    face arrays are read-only; one-off batches should use extrude_polygons.
+    """
+    return list(_extrude_wkb(shapely.to_wkb(geom), float(height)))
+
+
+def extrude_polygons(geoms, heights) -> List[List[np.ndarray]]:
+    """
+    extrude_polygon for many footprints: one get_coordinates call and one
+    _build_sides pass for the whole batch. Returns one face list per geometry.
+    """
+    polys = _largest_polygons(geoms)
+    heights = np.asarray(heights, dtype=float)
+    if np.any(heights <= 0):
+        raise ValueError("height must be positive")
+    if not len(polys):
+        return []
+
+    coords, idx = shapely.get_coordinates(shapely.get_exterior_ring(polys), return_index=True)
+    closing = np.r_[idx[1:] != idx[:-1], True]  # last point of each ring repeats the first
+    coords, idx = coords[~closing], idx[~closing]
+
+    counts = np.bincount(idx, minlength=len(polys))
+    if np.any(counts < 3):
+        raise ValueError("Polygon exterior has fewer than 3 vertices")
+
+    bottom, top, sides = _build_sides(coords, idx, heights)
+
+    out: List[List[np.ndarray]] = []
+    splits = np.cumsum(counts)[:-1]
+    for b, t, sd in zip(np.split(bottom, splits), np.split(top, splits), np.split(sides, splits)):
+        faces: List[np.ndarray] = [b, t[::-1]]
+        faces.extend(sd)
+        out.append(faces)
+    return out
+
+
+# below this many parcels the serial loop wins: per-parcel work is well
+# under a millisecond, while starting a process pool costs tens of ms (fork)
+# to about a second (Windows spawn)
+_PARALLEL_MIN_PARCELS = 2000
+
+
+def parallel_map(fn: Callable, *iterables: Sequence, workers: Optional[int] = None) -> list:
+    """
+    list(map(fn, *iterables)), fanned out over a process pool for batches of
+    at least _PARALLEL_MIN_PARCELS items. workers: None = min(cpu count, 8),
+    1 = always serial. fn must be picklable (module-level or partial).
+    """
+    n = len(iterables[0]) if iterables else 0
+    workers = min(os.cpu_count() or 1, 8) if workers is None else workers
+    if workers <= 1 or n < _PARALLEL_MIN_PARCELS:
+        return list(map(fn, *iterables))
+
+    chunksize = max(1, n // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *iterables, chunksize=chunksize))
+
+
+def _one_parcel(
+    polygon: BaseGeometry,
+    far: float,
+    *,
+    setback: float,
+    floor_height: float,
+    min_floors: int,
+) -> Tuple[VolumeResult, List[np.ndarray]]:
+    result = compute_buildable_volume(
+        polygon, far, setback=setback, floor_height=floor_height, min_floors=min_floors
+    )
+    return result, extrude_polygon(result.buildable_polygon, result.height)
+
+
+def compute_and_extrude_batch(
+    parcels: Sequence[BaseGeometry],
+    far: float | Sequence[float],
+    *,
+    setback: float = 0.0,
+    floor_height: float = 3.0,
+    min_floors: int = 1,
+    workers: Optional[int] = None,  # None = min(cpu count, 8), 1 = serial
+) -> List[Tuple[VolumeResult, List[np.ndarray]]]:
+    """
+    compute_buildable_volume + extrude_polygon for many parcels.
+    `far` is one value for all parcels or one per parcel.
+    Runs in a process pool for batches of at least _PARALLEL_MIN_PARCELS.
+    Returns [(VolumeResult, faces), ...] in input order.
+    """
+    parcels = list(parcels)
+    n = len(parcels)
+    fars = np.broadcast_to(np.asarray(far, dtype=float), (n,)).tolist()
+    fn = partial(_one_parcel, setback=setback, floor_height=floor_height, min_floors=min_floors)
+    return parallel_map(fn, parcels, fars, workers=workers)
+
+
+def _faces_bounds(faces) -> Tuple[np.ndarray, np.ndarray]:
+    """(min xyz, max xyz) over every face vertex, as one numpy reduction."""
+    pts = np.concatenate(faces)
+    return pts.min(axis=0), pts.max(axis=0)
+
+
+def _data_units_per_pixel(fig, extent: float, dpi: float) -> float:
+    """Size of one output pixel (at `dpi`) in data units, for a plot spanning `extent` across the figure width."""
+    return extent / (fig.get_size_inches()[0] * dpi)
+
+
+def _new_3d_axes(figsize: Tuple[float, float], *, offscreen: bool):
+    """
+    New figure + 3D axes. offscreen=True builds a bare Agg figure outside
+    pyplot (no GUI backend, nothing to plt.close); it can only be saved.
+    """
+    if offscreen:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+    else:
+        fig = plt.figure(figsize=figsize)
+    # artists draw in zorder (base map under buildings) instead of being
+    # re-sorted by depth every frame; faces inside a collection are still sorted
+    return fig, fig.add_subplot(111, projection="3d", computed_zorder=False)
+
+
 def plot_volume(
     faces,
     height,
     *,
     ax=None,
     show: bool = True,
+    save_path: str | None = None,
 ):
-    """Plot a single extruded volume."""
+    """Plot a single extruded volume (faces: list of (k,3) arrays from extrude_polygon)."""
     faces = list(faces)
 
     if ax is None:
-        fig = plt.figure(figsize=(8, 6))
-        ax = fig.add_subplot(111, projection="3d")
+        fig, ax = _new_3d_axes((8, 6), offscreen=not show and save_path is not None)
     else:
         fig = ax.get_figure()
 
     color = plt.cm.viridis(min(float(height) / 50.0, 1.0))
     poly = Poly3DCollection(faces, facecolors=color, edgecolor="k", alpha=0.85,shade=True)
-    ax.add_collection3d(poly)
-
-    xs, ys, zs = [], [], []
-    for face in faces:
-        for x, y, z in face:
-            xs.append(x)
-            ys.append(y)
-            zs.append(z)
+    ax.add_collection3d(poly, autolim=False)  # limits set below
 
+    mn, mx = _faces_bounds(faces)
     pad = 1.0
-    ax.set_xlim(min(xs) - pad, max(xs) + pad)
-    ax.set_ylim(min(ys) - pad, max(ys) + pad)
-    ax.set_zlim(0.0, max(zs) + pad)
+    ax.set_xlim(mn[0] - pad, mx[0] + pad)
+    ax.set_ylim(mn[1] - pad, mx[1] + pad)
+    ax.set_zlim(0.0, mx[2] + pad)
 
     ax.set_xlabel("X")
     ax.set_ylabel("Y")
     ax.set_zlabel("Z")
     ax.set_title(f"Volume (h={float(height):.1f})")
 
-    dx = max(xs) - min(xs)
-    dy = max(ys) - min(ys)
-    dz = max(zs)
+    dx = mx[0] - mn[0]
+    dy = mx[1] - mn[1]
+    dz = mx[2]
     ax.set_box_aspect([max(dx, 1e-6), max(dy, 1e-6), max(dz, 1e-6)])
 
     fig.tight_layout()
 
+    if save_path is not None:
+        fig.savefig(save_path, dpi=160)
+
     if show:
         plt.show(block=True)
 
@@ -284,71 +482,170 @@ def plot_volume(
 def plot_batch_volumes(
     buildings,
     *,
+    base_parcels=None,   # optional: list of (pid, polygon, props) from GeoJSON
     title: str = "Batch Volume",
     show: bool = True,
+    save_path: str | None = None,
     ax=None,
     max_buildings: Optional[int] = None,
+    colorbar: bool = True,  # False when reusing an ax that already has one
+    base_tolerance: Optional[float] = None,  # base-map simplify; None = ~1 output pixel, 0 = off
+    min_pixels: float = 1.0,  # skip buildings narrower than this on the output; 0 = draw all
+    dpi: int = 160,  # output resolution: save_path dpi, and the pixel size for simplify / LOD
 ):
     """
     Plot many buildings in one Matplotlib 3D figure.
 
     buildings: list of tuples like (pid, buildable_polygon, height, faces)
+    base_parcels: list of (pid, polygon, props) to draw as 2D base map
     """
     if max_buildings is not None:
         buildings = buildings[:max_buildings]
 
     if ax is None:
-        fig = plt.figure(figsize=(10, 8))
-        ax = fig.add_subplot(111, projection="3d")
+        fig, ax = _new_3d_axes((10, 8), offscreen=not show and save_path is not None)
     else:
         fig = ax.get_figure()
 
-    xs, ys, zs = [], [], []
-
-    for pid, poly, height, faces in buildings:
-        # color by height
-        color = plt.cm.viridis(min(float(height) / 80.0, 1.0))
-        poly3d = Poly3DCollection(
-            faces,
-            facecolors=color,
-            edgecolor="k",
-            linewidths=0.2,
-            alpha=0.85,
+    # ---- 1) draw base map (2D parcels on z=0) ----
+    if base_parcels is not None:
+        base = _largest_polygons(g for _, g, _ in base_parcels)
+
+        # vertices closer than one output pixel are invisible: simplify them away
+        if base_tolerance is None:
+            xmin, ymin, xmax, ymax = shapely.total_bounds(base)
+            base_tolerance = _data_units_per_pixel(fig, max(xmax - xmin, ymax - ymin), dpi)
+        if base_tolerance > 0:
+            simplified = shapely.simplify(base, base_tolerance, preserve_topology=False)
+            # parcels smaller than the tolerance collapse to empty: keep them unsimplified
+            collapsed = shapely.is_empty(simplified)
+            simplified[collapsed] = base[collapsed]
+            base = simplified
+        outlines = shapely.get_exterior_ring(base)
+
+        # all rings in one (n,3) buffer at z=0, split back per parcel
+        coords, idx = shapely.get_coordinates(outlines, return_index=True)
+        coords = np.column_stack([coords, np.zeros(len(coords))])
+        rings = np.split(coords, np.flatnonzero(np.diff(idx)) + 1)
+
+        # two artists for the whole base map: outlines + light fill
+        ax.add_collection3d(
+            Line3DCollection(rings, colors="0.4", linewidths=0.8, alpha=0.9, zorder=2), autolim=False
+        )
+        ax.add_collection3d(
+            Poly3DCollection([r[:-1] for r in rings], facecolors="0.9", edgecolors="none", alpha=0.15, zorder=1),
+            autolim=False,
         )
-        ax.add_collection3d(poly3d)
 
-        for face in faces:
-            for x, y, z in face:
-                xs.append(x)
-                ys.append(y)
-                zs.append(z)
+    # ---- 2) draw buildings, colored by height ----
+    cmap, norm = _HEIGHT_CMAP, _HEIGHT_NORM
 
-    if not xs:
+    all_faces = [f for (_, _, _, faces) in buildings for f in faces]
+    if not all_faces:
         raise ValueError("No geometry to plot (buildings list is empty?)")
 
+    # framing always covers every building, culled or not
+    mn, mx = _faces_bounds(all_faces)
+
+    # LOD: drop buildings whose footprint spans less than min_pixels output pixels
+    if min_pixels > 0:
+        b = shapely.bounds(np.array([bd[1] for bd in buildings], dtype=object))
+        size = np.fmax(b[:, 2] - b[:, 0], b[:, 3] - b[:, 1])
+        unit = _data_units_per_pixel(fig, max(mx[0] - mn[0], mx[1] - mn[1]), dpi)
+        keep = ~(size < min_pixels * unit)  # NaN bounds (no footprint) are kept
+        if not keep.all():
+            buildings = [bd for bd, k in zip(buildings, keep) if k]
+            all_faces = [f for (_, _, _, faces) in buildings for f in faces]
+
+    # per-face heights; the collection maps them through the shared cmap/norm,
+    # so set_height_cmap(vmin=, vmax=) recolors buildings and colorbar together
+    heights = np.fromiter((b[2] for b in buildings), dtype=np.float64, count=len(buildings))
+    counts = [len(faces) for (_, _, _, faces) in buildings]
+
+    # one collection for all buildings (one artist, one depth sort)
+    poly3d = Poly3DCollection(
+        all_faces,
+        cmap=cmap,
+        norm=norm,
+        edgecolor="k",
+        linewidths=0.2,
+        alpha=0.85,
+        zorder=3,
+    )
+    poly3d.set_array(np.repeat(heights, counts))
+    # limits are set explicitly below (autolim trips on ragged faces)
+    ax.add_collection3d(poly3d, autolim=False)
+
+    # ---- 3) bounds + aspect ----
     pad = 1.0
-    ax.set_xlim(min(xs) - pad, max(xs) + pad)
-    ax.set_ylim(min(ys) - pad, max(ys) + pad)
-    ax.set_zlim(0.0, max(zs) + pad)
+    ax.set_xlim(mn[0] - pad, mx[0] + pad)
+    ax.set_ylim(mn[1] - pad, mx[1] + pad)
+    ax.set_zlim(0.0, mx[2] + pad)
 
     ax.set_xlabel("X")
     ax.set_ylabel("Y")
     ax.set_zlabel("Z")
     ax.set_title(title)
 
-    dx = max(xs) - min(xs)
-    dy = max(ys) - min(ys)
-    dz = max(zs)
+    dx = mx[0] - mn[0]
+    dy = mx[1] - mn[1]
+    dz = mx[2]
     ax.set_box_aspect([max(dx, 1e-6), max(dy, 1e-6), max(dz, 1e-6)])
 
+    # ---- 4) legend (colorbar), once per figure ----
+    if colorbar:
+        # a fresh mappable per colorbar (cheap); the norm behind it is the shared one
+        sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
+        sm.set_array([])
+        cbar = fig.colorbar(sm, ax=ax, shrink=0.6, pad=0.02)
+        cbar.set_label("Building Height(m)")
+
     fig.tight_layout()
 
+    if save_path is not None:
+        fig.savefig(save_path, dpi=dpi)
+
     if show:
         plt.show(block=True)
 
     return ax
 
 
+def _render_batches(items, *, base_parcels=None, dpi: int = 160) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield (name, PNG bytes) per (name, buildings) item, drawing every batch on
+    one reused offscreen figure (ax.cla() between items; the height colorbar
+    has a fixed 0-80 m scale, so it is created once).
+    """
+    fig, ax = _new_3d_axes((10, 8), offscreen=True)
+    for k, (name, buildings) in enumerate(items):
+        ax.cla()
+        plot_batch_volumes(
+            buildings, base_parcels=base_parcels, title=name, show=False, ax=ax,
+            colorbar=k == 0, dpi=dpi,
+        )
+        buf = BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi)
+        yield name, buf.getvalue()
+
+
+def render_batches_to_files(items, out_dir: str, *, base_parcels=None, dpi: int = 160) -> List[str]:
+    """
+    Render many batches to out_dir/<name>.png with a single reused figure.
+    items: iterable of (name, buildings), buildings as for plot_batch_volumes.
+    Returns the written paths.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    paths: List[str] = []
+    for name, png in _render_batches(items, base_parcels=base_parcels, dpi=dpi):
+        path = out / f"{name}.png"
+        path.write_bytes(png)
+        paths.append(str(path))
+    return paths
+
+
 if __name__ == "__main__":
     # quick local test
     from shapely.geometry import box